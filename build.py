@@ -1,4 +1,5 @@
 import argparse
+import concurrent.futures
 import os
 import shutil
 import subprocess
@@ -54,9 +55,11 @@ def clean_directory(directory: str, file_endings: List[str]) -> None:
     if not os.path.isdir(directory):
         return
 
-    for filename in os.listdir(directory):
-        if any(filename.endswith(e) for e in file_endings):
-            os.remove(os.path.join(directory, filename))
+    suffixes = tuple(file_endings)
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(suffixes):
+                os.remove(entry.path)
 
 
 def clone_pymavlink() -> None:
@@ -68,17 +71,59 @@ def clone_pymavlink() -> None:
 
     if os.path.isdir(PYMAVLINK_DIR):
         # update the checkout if we already have it
+        # only the tip is ever used, so don't pull in any history
         print2("Updating pymavlink")
-        subprocess.check_call(["git", "pull"], cwd=PYMAVLINK_DIR)
+        subprocess.check_call(
+            ["git", "fetch", "--depth", "1", "origin"], cwd=PYMAVLINK_DIR
+        )
+        subprocess.check_call(
+            ["git", "reset", "--hard", "origin/HEAD"], cwd=PYMAVLINK_DIR
+        )
+
+        # the reset discards the pymavlink patch, so make sure it is re-applied
+        check_patch_file = os.path.join(BUILD_DIR, ".pymavlink-patched")
+        if os.path.isfile(check_patch_file):
+            os.remove(check_patch_file)
 
     else:
         # clone fresh
         print2("Cloning pymavlink")
         subprocess.check_call(
-            ["git", "clone", "https://github.com/ardupilot/pymavlink", PYMAVLINK_DIR]
+            [
+                "git",
+                "clone",
+                "--depth",
+                "1",
+                "--single-branch",
+                "https://github.com/ardupilot/pymavlink",
+                PYMAVLINK_DIR,
+            ]
         )
 
 
+def remove_stale_px4() -> None:
+    """
+    Remove the build directory if the existing PX4 checkout is the wrong version.
+    """
+    if not os.path.isdir(PX4_DIR):
+        return
+
+    # figure out what version we have locally. A single-branch clone of a tag
+    # records it as the fetch refspec, e.g. +refs/tags/v1.13.3:refs/tags/v1.13.3
+    local_version = (
+        subprocess.check_output(
+            ["git", "config", "--get", "remote.origin.fetch"], cwd=PX4_DIR
+        )
+        .decode()
+        .strip()
+        .split("/")[-1]
+    )
+    # if version does not match, nuke it
+    if local_version != PX4_VERSION:
+        print(f"Existing PX4 checkout is {local_version}, re-cloning")
+        shutil.rmtree(BUILD_DIR)
+
+
 def clone_px4() -> None:
     """
     Clone and patch PX4.
@@ -87,24 +132,7 @@ def clone_px4() -> None:
     # file to record if PX4 has been patched
     check_patch_file = os.path.join(BUILD_DIR, ".px4-patched")
 
-    if os.path.isdir(PX4_DIR):
-        # first, figure out what version we have locally
-        local_version = next(
-            l.split("/")[-1]
-            for l in subprocess.check_output(
-                ["git", "remote", "show", "origin", "-n"], cwd=PX4_DIR
-            )
-            .decode()
-            .splitlines()
-            if l.strip().startswith("refs")
-        )
-        # if version does not match, nuke it
-        if local_version != PX4_VERSION:
-            print(f"Existing PX4 checkout is {local_version}, re-cloning")
-            shutil.rmtree(BUILD_DIR)
-            clone_px4()
-
-    else:
+    if not os.path.isdir(PX4_DIR):
         # clone fresh
         print2("Cloning PX4")
         subprocess.check_call(
@@ -118,6 +146,11 @@ def clone_px4() -> None:
                 "--branch",
                 PX4_VERSION,
                 "--recurse-submodules",
+                # the submodules only need their pinned commits, not their history
+                "--shallow-submodules",
+                # fetch submodules in parallel, PX4 has dozens of them
+                "--jobs",
+                str(os.cpu_count() or 8),
             ]
         )
 
@@ -140,14 +173,21 @@ def clone_px4() -> None:
         touch_file(check_patch_file)
 
 
+def install_build_tools() -> None:
+    """
+    Install the Python packaging tools
+    """
+    print2("Installing Python build tools")
+    # no --upgrade, so this is a local no-op when wheel is already installed.
+    # the devcontainer image ships with up-to-date pip and wheel
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "wheel"])
+
+
 def install_dependencies() -> None:
     """
     Install any needed dependencies
     """
     print2("Installing Python dependencies")
-    subprocess.check_call(
-        [sys.executable, "-m", "pip", "install", "--upgrade", "pip", "wheel"]
-    )
     subprocess.check_call(
         [
             sys.executable,
@@ -184,15 +224,23 @@ def build_pymavlink(
         # record that it has been patched
         touch_file(check_patch_file)
 
-    # copy message definitions from px4 so we're using the exact same version
-    print2("Copying message definitions")
-    shutil.rmtree(
-        os.path.join(PYMAVLINK_DIR, "message_definitions", "v1.0"),
-        ignore_errors=True,
+    # link message definitions from px4 so we're using the exact same version.
+    # mavgen only reads them, so a symlink is as good as a copy
+    print2("Linking message definitions")
+    pymavlink_message_definitions_dir = os.path.join(
+        PYMAVLINK_DIR, "message_definitions", "v1.0"
     )
-    shutil.copytree(
-        message_definitions_dir,
-        os.path.join(PYMAVLINK_DIR, "message_definitions", "v1.0"),
+    if os.path.islink(pymavlink_message_definitions_dir):
+        os.remove(pymavlink_message_definitions_dir)
+    else:
+        shutil.rmtree(pymavlink_message_definitions_dir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(pymavlink_message_definitions_dir), exist_ok=True)
+    os.symlink(
+        os.path.relpath(
+            message_definitions_dir, os.path.dirname(pymavlink_message_definitions_dir)
+        ),
+        pymavlink_message_definitions_dir,
     )
 
     pymavlink_dist_dir = os.path.join(PYMAVLINK_DIR, "dist")
@@ -205,17 +253,47 @@ def build_pymavlink(
     # make a new environment with the mavlink dialect set
     new_env = os.environ.copy()
     new_env["MAVLINK_DIALECT"] = "bell"
-    print2("Building package")
-    subprocess.check_call(
-        [
-            sys.executable,
-            "setup.py",
-            "sdist",
-            "bdist_wheel",
-        ],
-        cwd=PYMAVLINK_DIR,
-        env=new_env,
-    )
+
+    # the package build and the Wireshark plugin generation read the same
+    # definitions and write to different places, so run them side by side
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        print2("Building package")
+        futures = [
+            executor.submit(
+                subprocess.check_call,
+                [
+                    sys.executable,
+                    "setup.py",
+                    "sdist",
+                    "bdist_wheel",
+                ],
+                cwd=PYMAVLINK_DIR,
+                env=new_env,
+            )
+        ]
+
+        # generate lua plugins for Wireshark
+        # https://mavlink.io/en/guide/wireshark.html
+        if should_build_wireshark:
+            print2("Building wireshark plugin")
+            futures.append(
+                executor.submit(
+                    subprocess.check_call,
+                    [
+                        sys.executable,
+                        "-m",
+                        "pymavlink.tools.mavgen",
+                        "--lang=WLua",
+                        "--wire-protocol=2.0",
+                        f"--output={os.path.join(DIST_DIR, 'bell-avr.lua')}",
+                        bell_xml_def,
+                    ],
+                    cwd=os.path.join(PYMAVLINK_DIR, ".."),
+                )
+            )
+
+        for future in futures:
+            future.result()
 
     # copy the outputs to the target directory
     for filename in os.listdir(pymavlink_dist_dir):
@@ -224,35 +302,32 @@ def build_pymavlink(
             os.path.join(DIST_DIR, filename),
         )
 
-    # generate lua plugins for Wireshark
-    # https://mavlink.io/en/guide/wireshark.html
-    if should_build_wireshark:
-        print2("Building wireshark plugin")
-        subprocess.check_call(
-            [
-                sys.executable,
-                "-m",
-                "pymavlink.tools.mavgen",
-                "--lang=WLua",
-                "--wire-protocol=2.0",
-                f"--output={os.path.join(DIST_DIR, 'bell-avr.lua')}",
-                bell_xml_def,
-            ],
-            cwd=os.path.join(PYMAVLINK_DIR, ".."),
-        )
-
 
 def build_px4(targets: List[str], version: str) -> None:
     print2("Building PX4 firmware")
 
     px4_build_dir = os.path.join(PX4_DIR, "build")
 
-    # clean the PX4 build and target dir
-    # clean_directory(px4_build_dir, [".px4"])
-    # clean_directory(DIST_DIR, [".px4"])
+    # the PX4 build dir is deliberately not cleaned. It lives in the
+    # per-version build directory which is cached between runs, so make
+    # only rebuilds what changed. Firmware in the target dir is replaced below.
+
+    # PX4's Makefile only treats the first goal as the board config, so each
+    # target needs its own make. Every target builds into its own directory,
+    # so build them concurrently and split the available cores between them
+    jobs = max(1, (os.cpu_count() or 1) // len(targets))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        futures = [
+            executor.submit(
+                subprocess.check_call, ["make", target, f"-j{jobs}"], cwd=PX4_DIR
+            )
+            for target in targets
+        ]
+        for future in futures:
+            future.result()
 
     for target in targets:
-        subprocess.check_call(["make", target, "-j"], cwd=PX4_DIR)
         shutil.copyfile(
             os.path.join(px4_build_dir, target, f"{target}.px4"),
             os.path.join(DIST_DIR, f"{target}.{PX4_VERSION}.{version}.px4"),
@@ -268,13 +343,23 @@ def main(
 ) -> None:
     os.makedirs(DIST_DIR, exist_ok=True)
 
-    # clone pymavlink if necessary
-    clone_pymavlink()
-
-    # get px4 cloned
-    clone_px4()
+    # throw away a PX4 checkout of the wrong version before anything
+    # starts writing into the build directory
+    remove_stale_px4()
+
+    # cloning pymavlink (if necessary), cloning PX4 and installing the
+    # packaging tools are independent and network-bound, so overlap them
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        futures = [
+            executor.submit(clone_pymavlink),
+            executor.submit(clone_px4),
+            executor.submit(install_build_tools),
+        ]
+        for future in futures:
+            future.result()
 
-    # install python dependencies for pymavlink
+    # install python dependencies for pymavlink. These come from the
+    # pymavlink checkout, which for newer versions is inside PX4
     install_dependencies()
 
     # build directory paths
@@ -324,20 +409,18 @@ def main(
                 cwd=os.path.join(PYMAVLINK_DIR, ".."),
             )
 
-        # git config does not matter, just need *something* to commit,
-        # they're not pushed anywhere
-        subprocess.check_call(
-            ["git", "config", "user.email", "github-bot@bellflight.com"], cwd=PX4_DIR
-        )
-        subprocess.check_call(
-            ["git", "config", "user.name", "Github Actions"], cwd=PX4_DIR
-        )
-
         # changes need to be committed to build
         subprocess.check_call(["git", "add", "."], cwd=PX4_DIR)
+
+        # git config does not matter, just need *something* to commit,
+        # they're not pushed anywhere
         subprocess.check_call(
             [
                 "git",
+                "-c",
+                "user.email=github-bot@bellflight.com",
+                "-c",
+                "user.name=Github Actions",
                 "commit",
                 "--no-gpg-sign",
                 "-m",